@@ -18,25 +18,179 @@ is displayed to the user, along with the time taken to solve it.
 """
 
 
+import argparse
+import hashlib
+import json
+import os
 import time
-import copy
+from array import array
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 import cv2
 import matplotlib.pyplot as plt
 from PIL import Image
 import pytesseract
 
+try:
+    from solver_numba import init_masks, solve_nb, warm_up #optional, needs numba to compile the solver
+except ImportError:
+    solve_nb = None
+
+try:
+    import onnxruntime as ort #optional, runs the batched digit classifier
+except ImportError:
+    ort = None
+
+try:
+    from tesserocr import PyTessBaseAPI, PSM #optional, in-process Tesseract instead of one subprocess per cell
+except ImportError:
+    PyTessBaseAPI = None
+
+
+#small int8-quantized digit CNN (2 conv + 2 FC, 10 classes with class 0 = empty cell) taking
+#28x28 float cells in [0, 1], as an (n, 1, 28, 28) or (n, 28, 28, 1) batch
+DIGIT_MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "digits_cnn_int8.onnx")
+_digit_model = None #loaded lazily by _load_digit_model, False once it turned out to be unavailable
+
+
+#printed digit exemplars as {"<glyph hash>": digit} (see SudokuBoard._glyph_hash), checked before Tesseract
+GLYPH_TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "glyph_table.json")
+GLYPH_MAX_DISTANCE = 6 #most differing bits for the nearest exemplar to count as a match
+_glyph_table = None #loaded lazily by _load_glyph_table
+
+
+#results memoized by content: SHA-256 of the warped grid image -> digits, board bytes -> solution
+CACHE_SIZE = 128
+_ocr_cache = {}
+_solution_cache = {}
+
+
+def _cache_get(cache, key):
+    """Return the value stored under key (marking it as recently used), or None."""
+    value = cache.pop(key, None)
+    if value is not None:
+        cache[key] = value
+    return value
+
+
+def _cache_put(cache, key, value):
+    """Store value under key, dropping the least recently used entry once the cache is full."""
+    if len(cache) >= CACHE_SIZE:
+        del cache[next(iter(cache))]
+    cache[key] = value
+
+
+#warped grid side in pixels: 28 px cells match the digit model input, Tesseract gets 56 px cells
+CNN_GRID_SIZE = 28 * 9
+TESSERACT_GRID_SIZE = 56 * 9
+
+#parallel Tesseract subprocesses when cells are read one by one
+OCR_WORKERS = os.cpu_count() or 1
+
+
+#digits drawn with strokes thinner than this (in pixels) get a second, dilated OCR try
+MAX_THIN_STROKE_WIDTH = 2.5
+
+
+#a grid candidate must cover this share of the image and have a bounding box this close to square (width / height)
+MIN_GRID_AREA = 0.1
+MIN_GRID_ASPECT = 0.8
+
+
+#minimum gap between the mean ink and paper gray levels for the global Otsu threshold to be trusted
+MIN_OTSU_CONTRAST = 60
+
+#ink never covers more than half of a Sudoku image, a larger Otsu foreground (white after inverting) is background
+MAX_OTSU_FOREGROUND = 0.5
+
+#manual input clean-up: drop spaces and turn '.' into 0
+INPUT_TABLE = str.maketrans({" ": "", ".": "0"})
+
+#display template for one row: a vertical line every 3 cols, a dot for empty cells
+ROW_FMT = " {}  {}  {} | {}  {}  {} | {}  {}  {} "
+CELL_CHARS = ".123456789"
+SEPARATOR = "-" * 29
+
+
+#box index (0-8) of every cell, as a tuple of tuples for the fastest scalar indexing
+BOX_OF = tuple(tuple(3 * (r // 3) + c // 3 for c in range(9)) for r in range(9))
+
+#(row, col) of the top-left cell of the box every cell is in
+BOX_START = tuple(tuple((3 * (r // 3), 3 * (c // 3)) for c in range(9)) for r in range(9))
+
+
+def _peers_of(idx):
+    """Flat indices (row * 9 + col) of the 20 other cells sharing a row, column or box with flat cell idx, in order."""
+    row, col = divmod(idx, 9)
+    return tuple(
+        other for other in range(81)
+        if other != idx and (other // 9 == row or other % 9 == col or BOX_OF[other // 9][other % 9] == BOX_OF[row][col])
+    )
+
+
+#the 20 peers of every flat cell as tuples (fastest to iterate), so propagation only rechecks the cells a placement can affect
+PEERS = tuple(_peers_of(idx) for idx in range(81))
+
+#bit offsets of the row, col and box of every flat cell in the pure-Python solver's packed masks
+CELL_SHIFTS = tuple((i // 9 * 9, i % 9 * 9, BOX_OF[i // 9][i % 9] * 9) for i in range(81))
+
+
+def _load_digit_model():
+    """
+    Load the ONNX digit classifier once and reuse it for every board.
+
+    Returns:
+        onnxruntime.InferenceSession: The loaded model, or None if onnxruntime or the model file is missing
+        or the model failed to load (only tried and reported once).
+    """
+    global _digit_model
+    if _digit_model is None:
+        _digit_model = False
+        if ort is not None and os.path.exists(DIGIT_MODEL_PATH):
+            try:
+                _digit_model = ort.InferenceSession(DIGIT_MODEL_PATH)
+            except Exception as e:
+                print(f"Warning: Could not load digit model ({e}), using Tesseract instead.")
+    return _digit_model or None
+
+
+def _load_glyph_table():
+    """
+    Load the glyph exemplar table once and reuse it for every board.
+
+    Returns:
+        dict: Glyph hash -> digit, empty if the table file is missing or unreadable.
+    """
+    global _glyph_table
+    if _glyph_table is None:
+        _glyph_table = {}
+        if os.path.exists(GLYPH_TABLE_PATH):
+            try:
+                with open(GLYPH_TABLE_PATH) as f:
+                    _glyph_table = {int(key): int(digit) for key, digit in json.load(f).items()}
+            except (OSError, ValueError) as e:
+                print(f"Warning: Could not load glyph table ({e}), using Tesseract only.")
+    return _glyph_table
+
 
 class SudokuBoard:
     """
     Class representing a Sudoku board.
     """
-    def __init__(self):
+    def __init__(self, ocr="auto"):
         """
         Initialize the Sudoku board (9x9 grid).
+
+        Args:
+            ocr (str): "auto" to read image digits with the digit model when it is available,
+                "tesseract" to always use Tesseract, None for a board that never reads images.
         """
-        self.board = np.zeros((9, 9), dtype=int)  #main 9x9 grid 
+        self.board = np.zeros((9, 9), dtype=np.int8)  #main 9x9 grid, single digits fit in one byte per cell
         self.original = np.zeros((9, 9), dtype=bool) #keeps track of which numbers were filled in by the user
+        self.digit_model = _load_digit_model() if ocr == "auto" else None #batched digit classifier, None if unavailable
+        self._digit_batch = None #model input, allocated on the first image and reused after that
+        self.glyph_table = _load_glyph_table() if ocr is not None else {} #known printed glyphs, read without Tesseract
+        self.grid_image = None #top-down grid of the last loaded image, for save_glyphs
 
 
     def load_user_input(self):
@@ -51,7 +205,7 @@ class SudokuBoard:
             valid_input = False
             while not valid_input:
                 row_input = input(f"Enter row {i + 1} (9 digits): ") #ask for one row of numbers 
-                row_input = row_input.replace(" ", "").replace(".","0") #clean up the input, removes spaces and turn '.' into 0
+                row_input = row_input.translate(INPUT_TABLE) #clean up the input, removes spaces and turn '.' into 0
 
                 #check that there are only 9 characters 
                 if len(row_input) != 9:
@@ -59,19 +213,14 @@ class SudokuBoard:
                     continue
 
                 try:
-                    row = [int(cell) for cell in row_input] #turn each character into a number
-                    #make sure all numbers are between 0 and 9
-                    if not all(0 <= cell <= 9 for cell in row):
-                        print("Error: Digits must be between 0 and 9.")
-                        continue
+                    #turn all characters into numbers at once, anything that isn't a digit ends up above 9
+                    row = np.frombuffer(row_input.encode("ascii"), dtype=np.uint8) - ord("0")
+                    if (row > 9).any():
+                        raise ValueError
 
                     valid_input = True #if we made it here, the input is valid
                     self.board[i] = row  #save the row to the board
-
-                    #mark the numbers that aren't zero as original
-                    for j in range(9):
-                        if row[j] != 0:      
-                            self.original[i][j] = True
+                    self.original[i] = row != 0  #mark the numbers that aren't zero as original
 
                 except ValueError:
                     print("Error: Invalid input. Please enter digits only.")
@@ -81,10 +230,14 @@ class SudokuBoard:
         print("=" * 35)
         self.display()  #show the board 
 
-    def load_from_image(self, image_path):
+    def load_from_image(self, image_path, debug=False):
         """
         Load a Sudoku puzzle from an image file.
         Applies preprocessing, perspective correction, splits grid, and uses OCR to detect digits.
+
+        Args:
+            image_path (str): Path to the Sudoku image.
+            debug (bool): Show the warped grid before it is split into cells.
         """
         print(f"Loading puzzle from image: {image_path}")
 
@@ -94,19 +247,37 @@ class SudokuBoard:
             print(f"Error: Could not open or find the image at {image_path}")
             return False
 
+        #keep the preprocessing chain on the OpenCL device when one is available
+        use_opencl = cv2.ocl.haveOpenCL() and cv2.ocl.useOpenCL()
+        if use_opencl:
+            image = cv2.UMat(image)
+
         #convert the image to grayscale
         gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
 
-        #apply Gaussian blur to reduce noise and improve thresholding
-        blurred = cv2.GaussianBlur(gray, (7, 7), 0)
-
-        #apply adaptive thresholding to get a binary image with inverted colors
-        thresh = cv2.adaptiveThreshold(
-            blurred, 255,
-            cv2.ADAPTIVE_THRESH_GAUSSIAN_C,  #use a weighted sum of neighborhood values
-            cv2.THRESH_BINARY_INV,           #invert the colors: digits become white
-            11, 2                            #block size and constant for adaptive threshold
-        )
+        #apply a global Otsu threshold to get a binary image with inverted colors (digits become white),
+        #one histogram pass instead of blurring and thresholding every neighborhood
+        otsu_threshold, thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)
+
+        #bring the results back to host memory for contour detection and the warp
+        if use_opencl:
+            gray = gray.get()
+            thresh = thresh.get()
+
+        #Otsu needs clearly separated ink and paper, and dark ink on light paper (on a dark background
+        #the background becomes the foreground); fall back to adaptive thresholding otherwise
+        if (self._otsu_contrast(gray, otsu_threshold) < MIN_OTSU_CONTRAST
+                or cv2.countNonZero(thresh) > MAX_OTSU_FOREGROUND * thresh.size):
+            #apply Gaussian blur to reduce noise and improve thresholding
+            blurred = cv2.GaussianBlur(gray, (7, 7), 0)
+
+            #apply adaptive thresholding to get a binary image with inverted colors
+            thresh = cv2.adaptiveThreshold(
+                blurred, 255,
+                cv2.ADAPTIVE_THRESH_GAUSSIAN_C,  #use a weighted sum of neighborhood values
+                cv2.THRESH_BINARY_INV,           #invert the colors: digits become white
+                11, 2                            #block size and constant for adaptive threshold
+            )
 
         #detect contours in the binary image
         contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
@@ -114,50 +285,58 @@ class SudokuBoard:
             print("Error: No contours found in the image.")
             return False
 
-        #select the largest contour, assuming it is the Sudoku grid
-        largest_contour = max(contours, key=cv2.contourArea)
-
-        #approximate the contour to a 4-point polygon
-        peri = cv2.arcLength(largest_contour, True)
-        approx = cv2.approxPolyDP(largest_contour, 0.02 * peri, True)
-
-        #check if the polygon has exactly 4 corners
-        if len(approx) != 4:
-            print(f"Error: Could not find a proper grid (found {len(approx)} points instead of 4).")
+        #rank the contours by their cheap bounding-box area, largest first
+        rects = [cv2.boundingRect(contour) for contour in contours]
+        areas = [w * h for _, _, w, h in rects]
+        min_area = MIN_GRID_AREA * thresh.shape[0] * thresh.shape[1] #the grid is a sizeable part of the image
+
+        #take the first roughly square contour that approximates to a 4-point polygon, assuming it is the Sudoku grid
+        approx = None
+        for idx in np.argsort(areas)[::-1]:
+            if areas[idx] < min_area:
+                break #the rest are even smaller
+            _, _, w, h = rects[idx]
+            if not MIN_GRID_ASPECT <= w / h <= 1 / MIN_GRID_ASPECT:
+                continue #text lines, bars and other long shapes
+            peri = cv2.arcLength(contours[idx], True)
+            candidate = cv2.approxPolyDP(contours[idx], 0.02 * peri, True)
+            if len(candidate) == 4:
+                approx = candidate
+                break
+
+        #check if a polygon with exactly 4 corners was found
+        if approx is None:
+            print("Error: Could not find a proper grid (no large, square contour with 4 corners).")
             return False
 
         #try to apply a perspective transform to get a top-down view of the grid
         try:
-            grid_image = self._apply_perspective_transform(gray, approx)
+            #warp straight to the size the digit reader works at instead of upscaling every cell
+            side_length = CNN_GRID_SIZE if self.digit_model is not None else TESSERACT_GRID_SIZE
+            grid_image = self._apply_perspective_transform(gray, approx, side_length)
         except Exception as e:
             print(f"Error during perspective transform: {e}")
             return False
 
-        #try to split the corrected grid image into 81 cell images
-        try:
-            cell_images = self._split_grid(grid_image)
-        except Exception as e:
-            print(f"Error splitting grid into cells: {e}")
-            return False
+        self.grid_image = grid_image
 
-        # Initialize the board and marker for original (pre-filled) cells
-        self.board = np.zeros((9, 9), dtype=int)
-        self.original_cells = np.zeros((9, 9), dtype=bool)
+        if debug:
+            plt.imshow(grid_image, cmap="gray")
+            plt.title("Warped grid")
+            plt.show()
 
-        #loop through each of the 81 cells to detect digits
-        for i in range(9):
-            for j in range(9):
-                cell_idx = i * 9 + j
-                try:
-                    #recognize digit in the current cell image
-                    digit = self._recognize_digit(cell_images[cell_idx])
-                    self.board[i, j] = digit
-                    if digit != 0:
-                        #mark original clues (pre-filled digits)
-                        self.original_cells[i, j] = True
-                except Exception as e:
-                    print(f"Warning: Failed to recognize digit at cell ({i}, {j}): {e}")
-                    self.board[i, j] = 0  #default to empty if recognition fails
+        #reuse the digits if this exact grid was read before
+        grid_key = hashlib.sha256(grid_image.tobytes()).digest()
+        digits = _cache_get(_ocr_cache, grid_key)
+        if digits is None:
+            digits = self._read_digits(grid_image)
+            if digits is None:
+                return False
+            _cache_put(_ocr_cache, grid_key, digits)
+
+        #fill the board and mark the original clues (pre-filled digits)
+        self.board = digits.reshape(9, 9).copy()
+        self.original_cells = self.board != 0
 
         #display the final loaded board
         print("=" * 35)
@@ -166,20 +345,107 @@ class SudokuBoard:
         self.display()
         return True
     
-    def _apply_perspective_transform(self, image, contour):
+    def _read_digits(self, grid_image):
+        """
+        Split the top-down grid image into cells and recognize the digit in each one.
+
+        Returns:
+            np.ndarray: 81 recognized digits in row-major order (0 for empty), or None if the grid could not be split.
+        """
+        #try to split the corrected grid image into 81 cell images
+        try:
+            cell_images = self._split_grid(grid_image)
+        except Exception as e:
+            print(f"Error splitting grid into cells: {e}")
+            return None
+
+        digits = None
+        if self.digit_model is not None:
+            try:
+                #recognize all 81 cells in one batched inference
+                digits = self._recognize_digits_batch(cell_images)
+            except Exception as e:
+                print(f"Warning: Digit model failed ({e}), falling back to Tesseract.")
+
+        if digits is None:
+            try:
+                #read all the cells with a single Tesseract run on a mosaic
+                digits = self._recognize_digits_mosaic(cell_images)
+            except Exception as e:
+                print(f"Warning: Batched OCR failed ({e}), reading cells one by one.")
+                digits = np.full(81, -1, dtype=np.int8)
+
+            #loop through the cells the mosaic could not read to detect their digits one by one,
+            #sharing one in-process Tesseract (model loaded once) between them when tesserocr is installed
+            pending = np.flatnonzero(digits == -1)
+            api = self._open_tesseract_api() if len(pending) else None
+            try:
+                digits[pending] = self._recognize_cells(cell_images, pending, api)
+            finally:
+                if api is not None:
+                    api.End()
+
+        return digits
+
+    def _recognize_cells(self, cell_images, cell_indices, api=None):
+        """
+        Recognize the digits of the given cells one by one with Tesseract.
+
+        Without an in-process API every cell is a separate Tesseract subprocess, so the cells are
+        read in parallel threads (they wait on the subprocesses, not the GIL). A tesserocr API is
+        not thread-safe, so its cells are read in order.
+
+        Args:
+            cell_images (np.ndarray): The (81, height, width) grayscale cell images in row-major order.
+            cell_indices (np.ndarray): Flat indices of the cells to read.
+            api (tesserocr.PyTessBaseAPI): Optional in-process Tesseract from _open_tesseract_api.
+
+        Returns:
+            list: The digit of every given cell, 0 for empty or unreadable cells.
+        """
+        def read(cell_idx):
+            try:
+                #recognize digit in the current cell image
+                return self._recognize_digit(cell_images[cell_idx], api)
+            except Exception as e:
+                i, j = divmod(cell_idx, 9)
+                print(f"Warning: Failed to recognize digit at cell ({i}, {j}): {e}")
+                return 0  #default to empty if recognition fails
+
+        if api is not None or len(cell_indices) < 2:
+            return [read(cell_idx) for cell_idx in cell_indices]
+
+        with ThreadPoolExecutor(max_workers=min(OCR_WORKERS, len(cell_indices))) as executor:
+            return list(executor.map(read, cell_indices))
+
+    def _otsu_contrast(self, gray, threshold):
+        """
+        Measure how well Otsu's threshold separates the image.
+
+        Returns:
+            float: Difference between the mean gray level above and below the threshold (0 if one side is empty).
+        """
+        hist = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+        levels = np.arange(256)
+        split = int(threshold) + 1
+        dark, light = hist[:split], hist[split:]
+        if dark.sum() == 0 or light.sum() == 0:
+            return 0.0
+        return (levels[split:] @ light) / light.sum() - (levels[:split] @ dark) / dark.sum()
+
+    def _apply_perspective_transform(self, image, contour, side_length=TESSERACT_GRID_SIZE):
         """Apply perspective transform to get a top-down view of the grid"""
         # Find the corners of the grid
         rect = self._order_points(contour.reshape(len(contour), 2))
         
         # Define the destination points for the transform (a square)
-        side_length = 900  # The target size of our grid
         dst = np.array([
             [0, 0],
             [side_length - 1, 0],
             [side_length - 1, side_length - 1],
             [0, side_length - 1]
         ], dtype="float32")
-        
+
         # Calculate the perspective transform matrix and apply it
         transform_matrix = cv2.getPerspectiveTransform(rect, dst)
         warped = cv2.warpPerspective(image, transform_matrix, (side_length, side_length))
@@ -188,53 +454,283 @@ class SudokuBoard:
     
     def _order_points(self, pts):
         """Order points in top-left, top-right, bottom-right, bottom-left order"""
-        # Sort by sum of coordinates to get top-left and bottom-right
-        s = pts.sum(axis=1)
-        top_left = pts[np.argmin(s)].astype("float32")
-        bottom_right = pts[np.argmax(s)].astype("float32")
-        
-        # Sort by difference of coordinates to get top-right and bottom-left
-        diff = np.diff(pts, axis=1)
-        top_right = pts[np.argmin(diff)].astype("float32")
-        bottom_left = pts[np.argmax(diff)].astype("float32")
-        
-        return np.array([top_left, top_right, bottom_right, bottom_left], dtype=np.float32)
+        # Sort by angle around the centroid: with y pointing down this goes clockwise from top-left
+        center = pts.mean(axis=0)
+        angles = np.arctan2(pts[:, 1] - center[1], pts[:, 0] - center[0])
+        ordered = pts[np.argsort(angles)].astype(np.float32)
+
+        # Rotate so the top-left corner (smallest x + y) comes first
+        return np.roll(ordered, -np.argmin(ordered.sum(axis=1)), axis=0)
     
     def _split_grid(self, grid_image):
         """Split the Sudoku grid into 81 individual cells"""
-        cell_images = []
         cell_size = grid_image.shape[0] // 9
-        
-        for i in range(9):
-            for j in range(9):
-                # Extract cell with some margin to avoid grid lines
-                margin = int(cell_size * 0.1)
-                x = j * cell_size + margin
-                y = i * cell_size + margin
-                width = cell_size - 2 * margin
-                height = cell_size - 2 * margin
-                
-                cell = grid_image[y:y+height, x:x+width]
-                cell_images.append(cell)
-        
-        return cell_images
+        margin = int(cell_size * 0.1) #margin to avoid grid lines
+
+        #view the grid as (row, y, col, x) blocks and reorder to (cell, y, x) in one go
+        cells = grid_image[:cell_size * 9, :cell_size * 9].reshape(9, cell_size, 9, cell_size)
+        cells = cells.transpose(0, 2, 1, 3).reshape(81, cell_size, cell_size)
+
+        #crop the margin from every cell at once
+        return np.ascontiguousarray(cells[:, margin:cell_size - margin, margin:cell_size - margin])
     
-    def _recognize_digit(self, cell_image):
-        """Recognize digit in a Sudoku cell using OCR (Tesseract)."""
+    def _recognize_digits_batch(self, cell_images):
+        """
+        Recognize the digits of all 81 cells with a single run of the digit model.
+
+        Args:
+            cell_images (np.ndarray): The (81, height, width) grayscale cell images in row-major order.
+
+        Returns:
+            np.ndarray: 81 recognized digits, 0 for empty cells.
+        """
+        if self._digit_batch is None:
+            self._digit_batch = np.empty((81, 1, 28, 28), dtype=np.float32)
+
+        digits = np.zeros(81, dtype=np.int8)
+        filled = [] #cells that go through the model, empty ones stay 0
+        for cell_idx, cell_image in enumerate(cell_images):
+            #same binarization as the Tesseract path: digits become white on black
+            _, thresh = cv2.threshold(cell_image, 128, 255, cv2.THRESH_BINARY_INV)
+            if self._is_empty_cell(thresh):
+                continue
+            self._digit_batch[len(filled), 0] = cv2.resize(thresh, (28, 28), interpolation=cv2.INTER_AREA)
+            filled.append(cell_idx)
+
+        if not filled:
+            return digits
+
+        batch = self._digit_batch[:len(filled)]
+        batch /= 255.0
+
+        #the model takes channels first (n, 1, 28, 28) or channels last (n, 28, 28, 1)
+        model_input = self.digit_model.get_inputs()[0]
+        if model_input.shape[-1] == 1:
+            batch = batch.transpose(0, 2, 3, 1)
+
+        scores = self.digit_model.run(None, {model_input.name: batch})[0]
+
+        #class 0 means empty, classes 1-9 are the digits
+        digits[filled] = scores.argmax(axis=1)
+        return digits
+
+    def _recognize_digits_mosaic(self, cell_images):
+        """
+        Recognize the digits of all 81 cells with one Tesseract call on a 9x9 mosaic of the cells.
+
+        Args:
+            cell_images (np.ndarray): The (81, height, width) grayscale cell images in row-major order.
+
+        Returns:
+            np.ndarray: 81 digits, 0 for empty cells and -1 for non-empty cells Tesseract did not read.
+        """
+        pad = 10 #white border around every cell so Tesseract sees separate characters
+        tile_h = cell_images.shape[1] + 2 * pad
+        tile_w = cell_images.shape[2] + 2 * pad
+        mosaic = np.full((9 * tile_h, 9 * tile_w), 255, dtype=np.uint8)
+        digits = np.zeros(81, dtype=np.int8)
+
+        for cell_idx, cell_image in enumerate(cell_images):
+            _, thresh = cv2.threshold(cell_image, 128, 255, cv2.THRESH_BINARY_INV)
+            if self._is_empty_cell(thresh):
+                continue
+
+            #digits in a known font are looked up instead of read
+            digit = self._match_glyph(thresh)
+            if digit:
+                digits[cell_idx] = digit
+                continue
+
+            digits[cell_idx] = -1 #not read yet
+            i, j = divmod(cell_idx, 9)
+            y, x = i * tile_h + pad, j * tile_w + pad
+            mosaic[y:y + thresh.shape[0], x:x + thresh.shape[1]] = 255 - thresh #dark digit on white
+
+        #every filled cell was a known glyph, nothing left for Tesseract
+        if not (digits == -1).any():
+            return digits
+
+        config = '--psm 6 -c tessedit_char_whitelist=123456789'
+        data = pytesseract.image_to_data(mosaic, config=config, output_type=pytesseract.Output.DICT)
+
+        for text, left, top, width, height in zip(data["text"], data["left"], data["top"], data["width"], data["height"]):
+            text = text.strip()
+            if not text.isdigit():
+                continue
+
+            #neighbouring cells can come back as one word, so split its box evenly between the characters
+            i = (top + height // 2) // tile_h
+            for k, char in enumerate(text):
+                j = int((left + (k + 0.5) * width / len(text)) // tile_w)
+                if 0 <= i < 9 and 0 <= j < 9 and digits[i * 9 + j] == -1 and char != "0":
+                    digits[i * 9 + j] = int(char)
+
+        return digits
+
+    def _is_empty_cell(self, thresh):
+        """Return True if the inverted, thresholded cell holds no digit (not much white, or only noise and grid lines)."""
+        height, width = thresh.shape
+
+        #a digit always covers the middle of the cell, white only near the edges is leftover grid line
+        if not thresh[height // 3:2 * height // 3, width // 3:2 * width // 3].any():
+            return True
+
+        #a digit spans a few columns but never the whole cell, anything else is noise or a grid line.
+        #only the middle rows are counted, leftover grid lines along the top and bottom cross every column
+        active_cols = np.count_nonzero(thresh[height // 4:3 * height // 4].any(axis=0))
+        if active_cols < 3 or active_cols > width * 0.9:
+            return True
+
+        #pack 8 pixels per byte and count the white ones with a single popcount
+        packed = np.packbits(thresh > 0)
+        white = int.from_bytes(packed.tobytes(), "little").bit_count()
+        return white < thresh.size * 0.05
+
+    def _glyph_hash(self, thresh):
+        """
+        Fingerprint the digit of an inverted, thresholded cell: the bounding box of its largest
+        blob centred in the middle half of the cell, shrunk to 8x8, one bit per pixel.
+
+        Returns:
+            int: The 64-bit glyph hash, row-major with the top-left pixel as the highest bit,
+            or None if no blob is centred in the middle of the cell.
+        """
+        height, width = thresh.shape
+        count, labels, stats, centroids = cv2.connectedComponentsWithStats(thresh, connectivity=8)
+
+        #leftover grid line hugs the cell edges, so only blobs centred in the middle half can be the digit
+        cx, cy = centroids[1:, 0], centroids[1:, 1]
+        centred = (cx >= width / 4) & (cx < 3 * width / 4) & (cy >= height / 4) & (cy < 3 * height / 4)
+        if not centred.any():
+            return None
+        label = 1 + np.argmax(np.where(centred, stats[1:, cv2.CC_STAT_AREA], -1))
+
+        #keep only that blob's pixels inside its bounding box
+        x, y, w, h = stats[label, :4]
+        glyph = (labels[y:y + h, x:x + w] == label).astype(np.uint8) * 255
+        glyph = cv2.resize(glyph, (8, 8), interpolation=cv2.INTER_AREA)
+        return int.from_bytes(np.packbits(glyph > 127).tobytes(), "big")
+
+    def save_glyphs(self, path=GLYPH_TABLE_PATH):
+        """
+        Add the digits on the board as glyph exemplars of the last loaded image and write the glyph table.
+        Only do this once the board matches the image, a wrong digit would be reused for every similar glyph.
+
+        Args:
+            path (str): Where to write the table as JSON.
+
+        Returns:
+            int: Number of exemplars added or changed.
+        """
+        if self.grid_image is None:
+            print("Error: Load a puzzle from an image first.")
+            return 0
+
+        cell_images = self._split_grid(self.grid_image)
+        added = 0
+        for cell_idx, digit in enumerate(self.board.ravel().tolist()):
+            if digit == 0:
+                continue
+            _, thresh = cv2.threshold(cell_images[cell_idx], 128, 255, cv2.THRESH_BINARY_INV)
+            if self._is_empty_cell(thresh):
+                continue
+            key = self._glyph_hash(thresh)
+            if key is not None and self.glyph_table.get(key) != digit:
+                self.glyph_table[key] = digit
+                added += 1
+
+        with open(path, "w") as f:
+            json.dump({str(key): digit for key, digit in self.glyph_table.items()}, f, indent=1)
+        return added
+
+    def _match_glyph(self, thresh):
+        """
+        Look the digit of a non-empty, inverted and thresholded cell up in the glyph table.
+
+        Returns:
+            int: The digit of the exact or nearest (Hamming distance) exemplar, or 0 if none is close enough.
+        """
+        if not self.glyph_table:
+            return 0
+
+        key = self._glyph_hash(thresh)
+        if key is None:
+            return 0
+
+        digit = self.glyph_table.get(key)
+        if digit is not None:
+            return digit
+
+        #count the differing bits against every exemplar, one popcount each
+        distance, digit = min(((key ^ exemplar).bit_count(), digit) for exemplar, digit in self.glyph_table.items())
+        return digit if distance <= GLYPH_MAX_DISTANCE else 0
+
+    def _open_tesseract_api(self):
+        """
+        Start an in-process Tesseract set up to read one digit per image.
+
+        Returns:
+            tesserocr.PyTessBaseAPI: The API (call End() when done), or None if tesserocr is missing or fails to start.
+        """
+        if PyTessBaseAPI is None:
+            return None
+        try:
+            api = PyTessBaseAPI(psm=PSM.SINGLE_CHAR)
+            api.SetVariable("tessedit_char_whitelist", "123456789")
+            return api
+        except Exception as e:
+            print(f"Warning: Could not start tesserocr ({e}), using pytesseract instead.")
+            return None
+
+    def _ocr_single_char(self, image, api=None):
+        """Read one character from a padded cell image, in-process if an API is given, else with a Tesseract subprocess."""
+        if api is not None:
+            api.SetImage(Image.fromarray(image))
+            return api.GetUTF8Text().strip()
+
+        #tesseract configuration: treat image as a single character, and only look for digits 1-9
+        config = '--psm 10 --oem 3 -c tessedit_char_whitelist=123456789'
+        return pytesseract.image_to_string(image, config=config).strip()
+
+    def _stroke_width(self, thresh):
+        """
+        Estimate the stroke width of the digit in an inverted, thresholded cell.
+
+        Returns:
+            float: Mean length in pixels of the horizontal white runs in the middle rows (0 if there are none).
+        """
+        height = thresh.shape[0]
+        middle = thresh[height // 4:3 * height // 4] > 0
+
+        #a run starts at every white pixel whose left neighbour is black (or that sits on the left edge)
+        runs = np.count_nonzero(middle[:, 0]) + np.count_nonzero(middle[:, 1:] & ~middle[:, :-1])
+        return np.count_nonzero(middle) / runs if runs else 0.0
+
+    def _recognize_digit(self, cell_image, api=None):
+        """
+        Recognize digit in a Sudoku cell using OCR (Tesseract).
+
+        Args:
+            cell_image (np.ndarray): Grayscale cell image.
+            api (tesserocr.PyTessBaseAPI): Optional in-process Tesseract from _open_tesseract_api.
+        """
         try:
             #make the digit stand out more by inverting the colors 
             _, thresh = cv2.threshold(cell_image, 128, 255, cv2.THRESH_BINARY_INV)
             
-            #if hthe cell is mostly empty (not much white), assume it's blank
-            if np.sum(thresh) / 255 < cell_image.size * 0.05:
+            #if the cell is mostly empty (not much white), assume it's blank
+            if self._is_empty_cell(thresh):
                 return 0
+
+            #digits in a known font are looked up instead of read
+            digit = self._match_glyph(thresh)
+            if digit:
+                return digit
             
             #add some space aroumd the digit to help Tesseract read it 
             padded = cv2.copyMakeBorder(thresh, 20, 20, 20, 20, cv2.BORDER_CONSTANT, value=0)
             
-            #tesseract configuration: treat image as a single character, and only look for digits 1-9
-            config = '--psm 10 --oem 3 -c tessedit_char_whitelist=123456789'
-            digit_text = pytesseract.image_to_string(padded, config=config).strip()
+            digit_text = self._ocr_single_char(padded, api)
             
             #try converting the result into an integer 
             try:
@@ -244,13 +740,16 @@ class SudokuBoard:
             except (ValueError, IndexError):
                 pass
 
-            #second try if first one fails
+            #second try if first one fails, only worth it for thin strokes that dilation can thicken
+            if self._stroke_width(thresh) >= MAX_THIN_STROKE_WIDTH:
+                return 0
+
             #enhance the white region of the image to help Tesseract read it better
             kernel = np.ones((3, 3), np.uint8)  #create a kernel for dilation
             dilated = cv2.dilate(thresh, kernel, iterations=1)  #dilate the image to make the digits more prominent
             kernel_padded = cv2.copyMakeBorder(dilated, 20, 20, 20, 20, cv2.BORDER_CONSTANT, value=0)
 
-            digit_text = pytesseract.image_to_string(kernel_padded, config=config).strip()
+            digit_text = self._ocr_single_char(kernel_padded, api)
 
             try:
                 digit = int(digit_text)
@@ -269,24 +768,14 @@ class SudokuBoard:
         """
         Print the Sudoku board in a readable format.
         """
-        print("-" * 29) #top border
-        for i in range(9):
-            row = ""
-            for j in range(9):
-                #show a dot for empty cells 
-                if self.board[i][j] == 0:
-                    row += " . "                                
-                else:
-                    row += f" {self.board[i][j]} "
-
-                #add vertical line every 3 cols
-                if (j + 1) % 3 == 0 and j != 8:
-                    row += "|"                                  
-            print(row)
+        rows = [ROW_FMT.format(*[CELL_CHARS[v] for v in row]) for row in self.board.tolist()]
 
-            #add horizontal separator every 3 rows
-            if (i + 1) % 3 == 0:
-                print("-" * 29)                                         
+        #top border, then a horizontal separator after every 3 rows
+        lines = [SEPARATOR]
+        for i in range(0, 9, 3):
+            lines.extend(rows[i:i + 3])
+            lines.append(SEPARATOR)
+        print("\n".join(lines))
 
 
     def is_valid(self, row, col, num):
@@ -299,24 +788,17 @@ class SudokuBoard:
             num (int): Number to check (1-9).
         """
 
-        #check if the number already exists in this col
-        for i in range(9):
-            if self.board[i, col] == num:                              
-                return False
+        #check if the number already exists in this col, row or 3x3 box,
+        #each as one vectorized scan over a view of the board
+        if num in self.board[:, col]:
+            return False
 
-        #check if the number already exists in this row 
-        for j in range(9):
-            if self.board[row, j] == num:                          
-                return False
-        
-        #figure out where the 3x3 subgrid starts 
-        start_row, start_col = 3 * (row // 3), 3 * (col // 3)
-
-        #check if the num is already in teh same 3x3 box
-        for i in range(start_row, start_row + 3):                       
-            for j in range(start_col, start_col + 3):
-                if self.board[i, j] == num:
-                    return False
+        if num in self.board[row]:
+            return False
+
+        start_row, start_col = BOX_START[row][col]
+        if num in self.board[start_row:start_row + 3, start_col:start_col + 3]:
+            return False
         
         #if all checks are passed, it's valid move 
         return True
@@ -329,11 +811,12 @@ class SudokuBoard:
         Returns:
             tuple: (row, col) of the empty cell, or None if no empty cell is found.
         """
-        for i in range(9):
-            for j in range(9):
-                if self.board[i][j] == 0:
-                    return (i, j) #found an empty spot
-        return None #no more empty spots 
+        empty_cells = np.argwhere(self.board == 0) #all empty spots in one vectorized scan
+        if len(empty_cells) == 0:
+            return None #no more empty spots 
+
+        row, col = empty_cells[0]
+        return (int(row), int(col)) #found an empty spot
 
 class SudokuSolver:
     """
@@ -343,67 +826,239 @@ class SudokuSolver:
     def __init__(self, sudoku_board):
         """Initialize with a SodokuBoard object."""
         self.board = sudoku_board
-        self.solved_board = None
+        self.solved_board = SudokuBoard(ocr=None) #allocated once, every solve() copies into it
+        self.has_solved = False #set once solve() has run
         self.solving_time = 0
 
+        #scratch arrays for the compiled solver: the 3 x 9 row/col/box masks and the propagation trail
+        self._mask_arrays = np.zeros((3, 9), dtype=np.int32)
+        self._trail = np.zeros(81, dtype=np.int8)
+
     def solve(self):
         """Solve the Sudoku puzzle using backtracking."""
 
-        self.solved_board = copy.deepcopy(self.board) #creates a copy of the board to solve
-        start_time = time.time() #start timing
-        success = self._solve_backtracking() #call the recursive backtracking solver
-        self.solving_time = time.time() - start_time #end timing
+        #copy the two grids into the preallocated board (also casts boards set with another dtype to int8),
+        #the backtracking restores any cell it undoes. only board and original are carried over on purpose:
+        #the image-only state set by load_from_image (original_cells, grid_image) is not needed to solve
+        #or display the solution, and the solved board has no OCR setup
+        np.copyto(self.solved_board.board, self.board.board)
+        np.copyto(self.solved_board.original, self.board.original)
+        self.has_solved = True
+
+        #load or compile the compiled solver first, so the time below is the solve only
+        if solve_nb is not None:
+            warm_up()
+        start_time = time.perf_counter_ns() #start timing (monotonic, nanosecond resolution)
+
+        #a board that was solved before is answered from the cache
+        board_key = self.solved_board.board.tobytes()
+        cached = _cache_get(_solution_cache, board_key)
+        if cached is not None:
+            success, solution = cached
+            self.solved_board.board[:] = solution
+        else:
+            if solve_nb is not None:
+                #build the masks and run the compiled solver in place on a flat view of the int8 board
+                grid = self.solved_board.board.ravel()
+                rmask, cmask, bmask = self._mask_arrays
+                success = init_masks(grid, rmask, cmask, bmask) and solve_nb(grid, rmask, cmask, bmask, self._trail)
+            else:
+                #flat copy of the 81 cells as plain Python ints, cheaper to index than NumPy scalars
+                self._flat = array("b", self.solved_board.board.tobytes())
+
+                #cells that start empty never change position, so the scans below only visit these
+                self._empties = np.flatnonzero(self.solved_board.board == 0).tolist()
+
+                #build the bitmasks, then call the recursive backtracking solver starting from the clues
+                success = self._init_masks() and self._solve_backtracking(np.flatnonzero(self.solved_board.board).tolist())
+                self.solved_board.board[:] = np.frombuffer(self._flat, dtype=np.int8).reshape(9, 9)
+            _cache_put(_solution_cache, board_key, (success, self.solved_board.board.copy()))
+
+        self.solving_time = (time.perf_counter_ns() - start_time) * 1e-9 #end timing, in seconds
 
         return success  
+
+    def _init_masks(self):
+        """
+        Build the row, column and box bitmasks from the board in a single pass.
+        Each mask packs 9 houses of 9 bits into one integer: bit (house * 9 + d - 1)
+        is set when digit d is already used in that row, column or box.
+
+        Returns:
+            bool: False if a clue is repeated in a row, column or box, True otherwise.
+        """
+        self.row_mask = 0
+        self.col_mask = 0
+        self.box_mask = 0
+
+        for idx, num in enumerate(self._flat):
+            if num == 0:
+                continue
+
+            bit = 1 << (num - 1)
+
+            #a repeated clue can never be part of a valid solution
+            if ~self._candidates(idx) & bit:
+                return False
+
+            self._toggle(idx, bit)
+
+        return True
+
+    def _candidates(self, idx):
+        """Bitmask of the digits not yet used in the row, column and box of flat cell idx."""
+        row_shift, col_shift, box_shift = CELL_SHIFTS[idx]
+        return ~((self.row_mask >> row_shift) | (self.col_mask >> col_shift) | (self.box_mask >> box_shift)) & 0x1FF
+
+    def _toggle(self, idx, bit):
+        """Flip a digit bit in the masks of flat cell idx (sets it when placing, clears it when undoing)."""
+        row_shift, col_shift, box_shift = CELL_SHIFTS[idx]
+        self.row_mask ^= bit << row_shift
+        self.col_mask ^= bit << col_shift
+        self.box_mask ^= bit << box_shift
     
-    def _solve_backtracking(self):
-        """Recursive backtracking algo to solve the puzzle."""
+    def _find_mrv(self):
+        """
+        Find the empty cell with the fewest candidate digits (minimum remaining values).
 
-        empty_cell = self.solved_board.find_empty() #find an empty cell
+        Returns:
+            tuple: (idx, candidates) of the most constrained empty cell, where idx is its flat
+            index (row * 9 + col) and candidates is the bitmask of digits still allowed there,
+            or None if no empty cell is found.
+        """
+        best = None
+        best_count = 10
+        rows, cols, boxes = self.row_mask, self.col_mask, self.box_mask #the masks don't change during the scan
+
+        flat = self._flat
+        for idx in self._empties:
+            if flat[idx] != 0:
+                continue
+
+            row_shift, col_shift, box_shift = CELL_SHIFTS[idx]
+            candidates = ~((rows >> row_shift) | (cols >> col_shift) | (boxes >> box_shift)) & 0x1FF
+            count = candidates.bit_count()
+
+            #0 candidates is a dead end and 1 is a forced move, nothing can beat either
+            if count <= 1:
+                return (idx, candidates)
+
+            if count < best_count:
+                best = (idx, candidates)
+                best_count = count
+
+        return best
+
+    def _propagate(self, placed):
+        """
+        Forward checking: after the given cells were filled, look at their peers and fill every
+        naked single (empty cell with exactly one candidate) found there, then check the peers
+        of those cells too until nothing is forced anymore.
+
+        Args:
+            placed (list): Flat indices of the cells just filled.
+
+        Returns:
+            list: Flat indices of the cells filled, or None if an empty cell has no candidates
+            left (the cells filled by this call are undone first).
+        """
+        flat = self._flat
+        filled = []
+        queue = list(placed)
+        for src in queue: #the queue grows while it is read, every forced cell gets its peers checked
+            for idx in PEERS[src]:
+                if flat[idx] != 0:
+                    continue
+
+                candidates = self._candidates(idx)
+
+                #dead end, undo what this call filled
+                if candidates == 0:
+                    self._undo(filled)
+                    return None
+
+                #exactly one bit set, the cell is forced
+                if candidates & (candidates - 1) == 0:
+                    flat[idx] = candidates.bit_length()
+                    self._toggle(idx, candidates)
+                    filled.append(idx)
+                    queue.append(idx)
+
+        return filled
+
+    def _undo(self, cells):
+        """Clear the given flat cells from the board and the masks."""
+        for idx in cells:
+            self._toggle(idx, 1 << (self._flat[idx] - 1))
+            self._flat[idx] = 0
+
+    def _solve_backtracking(self, placed):
+        """
+        Recursive backtracking algo to solve the puzzle.
+
+        Args:
+            placed (list): Flat indices of the cells filled since the last propagation
+                (all the clues on the first call).
+        """
+
+        #fill the cells forced by the last placements before branching
+        filled = self._propagate(placed)
+        if filled is None:
+            return False
+
+        empty_cell = self._find_mrv() #find the most constrained empty cell
 
         #if no empty cell is found, the puzzle is solved!
         if empty_cell is None:
             return True
         
-        row, col = empty_cell
-
-        #try digits 1-9 for this empty cell
-        for num in range(1,10):
-
-            #check if the digit is valid in this position
-            if self.solved_board.is_valid(row, col, num):
-                self.solved_board.board[row, col] = num #place the digit
-
-                #recursively solve the rest of the puzzle
-                if self._solve_backtracking():
-                    return True 
-                
-                self.solved_board.board[row,col] = 0 #backtrack by setting the cell to 0
+        idx, candidates = empty_cell
+
+        #try each candidate digit, lowest first
+        while candidates:
+            bit = candidates & -candidates #isolate the lowest set bit
+            candidates ^= bit
+            self._flat[idx] = bit.bit_length() #place the digit
+            self._toggle(idx, bit) #mark the digit as used in this row, col and box
+
+            #recursively solve the rest of the puzzle
+            if self._solve_backtracking([idx]):
+                return True 
+            
+            #backtrack by clearing the digit from the masks and setting the cell to 0
+            self._toggle(idx, bit)
+            self._flat[idx] = 0
 
-        #no digits worked, so this puzzle is unsolvable 
+        #no digits worked, undo the forced cells too, this branch is unsolvable
+        self._undo(filled)
         return False
 
     def display_solution(self):
         """Displays the soln."""
 
-        if self.solved_board is None:
+        if not self.has_solved:
             print("The puzzle hasn't been solved yet.")
             return
         
         print("=" * 35)
         print("\nSolution:")
         self.solved_board.display()
-        print(f"Solving time: {self.solving_time:.3f} seconds")
+        print(f"Solving time: {self.solving_time:.6f} seconds")
 
 
 
-def main():
+def main(ocr="auto", debug=False, learn_glyphs=False):
     """
     Main function to run the code.
     This function provides a menu for the user to load Sudoku from manual input or image.
+
+    Args:
+        ocr (str): Digit reader for images, "auto" (digit model if available) or "tesseract".
+        debug (bool): Show the warped grid of loaded images.
+        learn_glyphs (bool): Offer to save the digits of every loaded image as glyph exemplars.
     """
 
-    board = SudokuBoard()  # Create a SudokuBoard object
+    board = SudokuBoard(ocr=ocr)  # Create a SudokuBoard object
 
     while True:
         print("\nSudoku Solver")
@@ -422,15 +1077,17 @@ def main():
         elif choice == '2':
             print("=" * 35)
             image_path = input("Enter the path to the Sudoku image: ")
-            success = board.load_from_image(image_path)
+            success = board.load_from_image(image_path, debug=debug)
             print("")
             print("=" * 35)
             if not success:
                 print("Failed to load puzzle from image. Try again or use manual input.")
+            elif learn_glyphs and input("Are all the digits correct? Save them as glyph exemplars (y/n): ").strip().lower() == "y":
+                print(f"Saved {board.save_glyphs()} new glyph exemplars to {GLYPH_TABLE_PATH}")
         
         elif choice == '3':
             # Check if board is empty
-            if np.sum(board.board) == 0:
+            if not board.board.any():
                 print("=" * 35)
                 print("\nBoard is empty. Please load a puzzle first.")
                 print("")
@@ -461,4 +1118,12 @@ def main():
             continue
 
 if __name__ == "__main__":
-    main()  # Run the main function
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Sudoku Solver with OCR and Backtracking")
+    parser.add_argument("--ocr", choices=["auto", "tesseract"], default="auto",
+                        help="digit reader for images: the digit model when available (auto) or Tesseract only")
+    parser.add_argument("--debug", action="store_true",
+                        help="show the warped grid image when loading a puzzle from an image")
+    parser.add_argument("--learn-glyphs", action="store_true",
+                        help="offer to save the digits of correctly read images as glyph exemplars")
+    args = parser.parse_args()
+    main(ocr=args.ocr, debug=args.debug, learn_glyphs=args.learn_glyphs)  # Run the main function
\ No newline at end of file
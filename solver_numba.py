@@ -0,0 +1,231 @@
+"""
+Numba-compiled Sudoku solver.
+
+Bitmask + MRV backtracking with forward-checking naked-single propagation on a flat board:
+- the board is an int8 array of the 81 cells in row-major order (0 for empty)
+- rmask, cmask and bmask are int32 arrays of 9 masks each, bit (d - 1) is set
+  when digit d is already used in that row, column or box
+
+main_code_block imports this module only when numba is installed and falls back
+to the pure Python solver otherwise.
+"""
+
+import numpy as np
+from numba import njit
+
+
+#box index (0-8) of every flat cell, so the solver avoids division in its inner loops
+BOX_OF_FLAT = np.array([3 * (i // 27) + (i % 9) // 3 for i in range(81)], dtype=np.int8)
+
+#flat indices of the 20 cells sharing a row, column or box with every flat cell
+PEERS_FLAT = np.array([
+    [p for p in range(81) if p != i and (p // 9 == i // 9 or p % 9 == i % 9 or BOX_OF_FLAT[p] == BOX_OF_FLAT[i])]
+    for i in range(81)
+], dtype=np.int8)
+
+#number of set bits of every 9-bit candidate mask, and the digit of every single-bit mask,
+#so the solver needs no bit-counting loops
+POPCOUNT = np.array([bin(mask).count("1") for mask in range(512)], dtype=np.int8)
+DIGIT_OF_BIT = np.zeros(257, dtype=np.int8)
+DIGIT_OF_BIT[[1 << (d - 1) for d in range(1, 10)]] = np.arange(1, 10)
+
+
+@njit(cache=True)
+def _undo(grid, rmask, cmask, bmask, trail, start, stop):
+    """Clear the cells trail[start:stop] from the flat board and its masks."""
+    for k in range(start, stop):
+        idx = trail[k]
+        bit = 1 << (grid[idx] - 1)
+        rmask[idx // 9] ^= bit
+        cmask[idx % 9] ^= bit
+        bmask[BOX_OF_FLAT[idx]] ^= bit
+        grid[idx] = 0
+
+
+@njit(cache=True)
+def _propagate(grid, rmask, cmask, bmask, trail, head, top):
+    """
+    Forward checking: check the peers of the cells trail[head:top] that were just filled and fill
+    every naked single (empty cell with exactly one candidate) among them, then the peers of those
+    cells too, until nothing is forced anymore.
+
+    Args:
+        grid, rmask, cmask, bmask: Flat board and masks, as in solve_nb. Updated in place.
+        trail (np.ndarray): int8 array of 81 slots recording the filled cells, the forced ones are appended.
+        head (int): Index in trail of the first cell whose peers are checked.
+        top (int): Index of the first free slot in trail.
+
+    Returns:
+        int: The new top of the trail, or -1 if an empty cell has no candidates left
+        (the cells filled by this call are undone first).
+    """
+    start = top
+    while head < top:
+        src = trail[head]
+        head += 1
+        for k in range(20):
+            idx = PEERS_FLAT[src, k]
+            if grid[idx] != 0:
+                continue
+            box = BOX_OF_FLAT[idx]
+            cand = ~(rmask[idx // 9] | cmask[idx % 9] | bmask[box]) & 0x1FF
+
+            #dead end, undo what this call filled
+            if cand == 0:
+                _undo(grid, rmask, cmask, bmask, trail, start, top)
+                return -1
+
+            #exactly one bit set, the cell is forced
+            if cand & (cand - 1) == 0:
+                grid[idx] = DIGIT_OF_BIT[cand]
+                rmask[idx // 9] |= cand
+                cmask[idx % 9] |= cand
+                bmask[box] |= cand
+                trail[top] = idx
+                top += 1
+
+    return top
+
+
+@njit(cache=True)
+def _solve(grid, rmask, cmask, bmask, trail, head, top):
+    """
+    Recursive step: propagate naked singles, then branch on the most constrained cell.
+
+    Args:
+        grid (np.ndarray): int8 array of the 81 cells in row-major order, 0 for empty. Filled in place.
+        rmask (np.ndarray): int32 array of the 9 row masks (bit d-1 set when digit d is used).
+        cmask (np.ndarray): int32 array of the 9 column masks.
+        bmask (np.ndarray): int32 array of the 9 box masks.
+        trail (np.ndarray): int8 scratch array of 81 slots recording the filled cells.
+        head (int): Index in trail of the first cell filled since the last propagation.
+        top (int): Index of the first free slot in trail.
+
+    Returns:
+        bool: True if the board was solved, False otherwise.
+    """
+    #fill the cells forced by the last placements before branching
+    new_top = _propagate(grid, rmask, cmask, bmask, trail, head, top)
+    if new_top == -1:
+        return False
+
+    #find the empty cell with the fewest candidates
+    best = -1
+    best_cand = 0
+    best_count = 10
+    for idx in range(81):
+        if grid[idx] != 0:
+            continue
+        cand = ~(rmask[idx // 9] | cmask[idx % 9] | bmask[BOX_OF_FLAT[idx]]) & 0x1FF
+        count = POPCOUNT[cand]
+        if count < best_count:
+            best = idx
+            best_cand = cand
+            best_count = count
+
+    #no empty cell left, the puzzle is solved
+    if best == -1:
+        return True
+
+    row = best // 9
+    col = best % 9
+    box = BOX_OF_FLAT[best]
+    cand = best_cand
+    trail[new_top] = best #the branch cell is where the next propagation starts
+    while cand:
+        bit = cand & -cand #lowest remaining candidate
+        cand ^= bit
+        grid[best] = DIGIT_OF_BIT[bit]
+        rmask[row] |= bit
+        cmask[col] |= bit
+        bmask[box] |= bit
+        if _solve(grid, rmask, cmask, bmask, trail, new_top, new_top + 1):
+            return True
+        rmask[row] ^= bit
+        cmask[col] ^= bit
+        bmask[box] ^= bit
+        grid[best] = 0
+
+    #no digit worked, undo the forced cells too
+    _undo(grid, rmask, cmask, bmask, trail, top, new_top)
+    return False
+
+
+@njit(cache=True)
+def init_masks(board_flat, rmask, cmask, bmask):
+    """
+    Fill the row, column and box masks from the clues on the board.
+
+    Args:
+        board_flat (np.ndarray): int8 array of the 81 cells in row-major order, 0 for empty.
+        rmask, cmask, bmask (np.ndarray): int32 arrays of 9 masks each, overwritten.
+
+    Returns:
+        bool: False if a clue is repeated in a row, column or box, True otherwise.
+    """
+    rmask[:] = 0
+    cmask[:] = 0
+    bmask[:] = 0
+    for idx in range(81):
+        num = board_flat[idx]
+        if num == 0:
+            continue
+        bit = 1 << (num - 1)
+        row = idx // 9
+        col = idx % 9
+        box = BOX_OF_FLAT[idx]
+
+        #a repeated clue can never be part of a valid solution
+        if (rmask[row] | cmask[col] | bmask[box]) & bit:
+            return False
+
+        rmask[row] |= bit
+        cmask[col] |= bit
+        bmask[box] |= bit
+
+    return True
+
+
+@njit(cache=True)
+def solve_nb(board_flat, rmask, cmask, bmask, trail):
+    """
+    Solve the board in place.
+
+    Args:
+        board_flat (np.ndarray): int8 array of the 81 cells in row-major order, 0 for empty.
+        rmask, cmask, bmask (np.ndarray): int32 masks built by init_masks, updated in place.
+        trail (np.ndarray): int8 scratch array of 81 slots.
+
+    Returns:
+        bool: True if the board was solved, False otherwise.
+    """
+    #the clues seed the first propagation. the counter starts as a typed zero instead of the literal 0,
+    #so the recursive _solve is compiled (and cached) for one signature only
+    top = np.int64(0)
+    for idx in range(81):
+        if board_flat[idx] != 0:
+            trail[top] = idx
+            top += 1
+    return _solve(board_flat, rmask, cmask, bmask, trail, np.int64(0), top)
+
+
+_warmed_up = False
+
+
+def warm_up():
+    """
+    Load (or compile, on the first run) the solver functions once with a tiny solve, so the
+    first real solve is not charged for it. Later calls do nothing.
+    """
+    global _warmed_up
+    if _warmed_up:
+        return
+
+    #same argument types as the real calls: a flat int8 board, int32 masks and an int8 trail
+    board_flat = np.zeros(81, dtype=np.int8)
+    masks = np.zeros((3, 9), dtype=np.int32)
+    trail = np.zeros(81, dtype=np.int8)
+    rmask, cmask, bmask = masks
+    init_masks(board_flat, rmask, cmask, bmask)
+    solve_nb(board_flat, rmask, cmask, bmask, trail)
+    _warmed_up = True
@@ -1,6 +1,13 @@
+import io
+import json
+import os
+import tempfile
+import time
 import unittest
 import numpy as np
+import cv2
 from unittest.mock import patch, MagicMock
+import main_code_block
 from main_code_block import SudokuBoard, SudokuSolver  
 
 class TestSudokuSolver(unittest.TestCase):
@@ -25,6 +32,40 @@ class TestSudokuSolver(unittest.TestCase):
         solved_board = solver.solved_board.board
         self.assertFalse(0 in solved_board)
 
+    def test_solver_solves_hard_board(self):
+        hard = "800000000003600000070090200050007000000045700000100030001000068008000090000000000"
+        self.board.board = np.array([int(c) for c in hard]).reshape(9, 9)
+        solver = SudokuSolver(self.board)
+        self.assertTrue(solver.solve())
+        solved_board = solver.solved_board.board
+        for i in range(9):
+            self.assertEqual(sorted(solved_board[i]), list(range(1, 10)))
+            self.assertEqual(sorted(solved_board[:, i]), list(range(1, 10)))
+
+    def test_solver_leaves_input_board_untouched(self):
+        before = self.board.board.copy()
+        solver = SudokuSolver(self.board)
+        self.assertTrue(solver.solve())
+        np.testing.assert_array_equal(before, self.board.board)
+
+    def test_repeated_solve_is_not_affected_by_earlier_result(self):
+        solver = SudokuSolver(self.board)
+        self.assertTrue(solver.solve())
+        first_solution = solver.solved_board.board.copy()
+        solver.solved_board.board[:] = 0
+        solver2 = SudokuSolver(self.board)
+        self.assertTrue(solver2.solve())
+        np.testing.assert_array_equal(first_solution, solver2.solved_board.board)
+
+    @unittest.skipIf(main_code_block.solve_nb is None, "numba is not installed")
+    def test_solving_time_excludes_solver_warm_up(self):
+        solver = SudokuSolver(self.board)
+        main_code_block._solution_cache.clear()
+        with patch("main_code_block.warm_up", side_effect=lambda: time.sleep(0.2)) as warm_up:
+            self.assertTrue(solver.solve())
+        warm_up.assert_called_once()
+        self.assertLess(solver.solving_time, 0.2)
+
     def test_unsolvable_board(self):
         self.board.board[0][2] = 5  # duplicate in row
         solver = SudokuSolver(self.board)
@@ -45,12 +86,200 @@ class TestSudokuSolver(unittest.TestCase):
     def test_find_empty(self):
         self.assertEqual(self.board.find_empty(), (0, 2))
 
+    def test_order_points(self):
+        pts = np.array([[90, 95], [10, 10], [100, 5], [5, 100]])
+        np.testing.assert_array_equal(
+            self.board._order_points(pts), [[10, 10], [100, 5], [90, 95], [5, 100]])
+
+    def test_order_points_rotated_grid(self):
+        pts = np.array([[100, 50], [0, 50], [50, 0], [50, 100]])
+        ordered = self.board._order_points(pts)
+        self.assertEqual(len({tuple(p) for p in ordered}), 4)
+        np.testing.assert_array_equal(ordered, [[50, 0], [100, 50], [50, 100], [0, 50]])
+
+    @patch("builtins.print")
+    def test_load_from_image_rejects_non_grid(self, _):
+        image = np.full((300, 300, 3), 255, dtype=np.uint8)
+        cv2.rectangle(image, (20, 130), (280, 160), (0, 0, 0), 3)  # a long box, like a line of text
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "not_a_grid.png")
+            cv2.imwrite(path, image)
+            self.assertFalse(self.board.load_from_image(path))
+
+    @patch("builtins.print")
+    def test_load_from_image_rejects_dark_background(self, _):
+        image = np.full((300, 300, 3), 30, dtype=np.uint8)  # light text on a dark screen
+        cv2.putText(image, "python main.py", (20, 150), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (230, 230, 230), 2)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "dark.png")
+            cv2.imwrite(path, image)
+            self.assertFalse(self.board.load_from_image(path))
+
+    def test_mosaic_ocr_maps_words_to_cells(self):
+        cells = np.full((81, 80, 80), 255, dtype=np.uint8)
+        for idx in (0, 1, 40):
+            cells[idx, 20:60, 30:50] = 0  # dark "digit" strokes
+        tile = 80 + 2 * 10
+        data = {  # "53" spans cells (0, 0) and (0, 1), "7" is in cell (4, 4)
+            "text": ["53", "7", ""],
+            "left": [30, 4 * tile + 30, 0],
+            "top": [20, 4 * tile + 20, 0],
+            "width": [tile + 20, 20, 0],
+            "height": [40, 40, 0],
+        }
+        with patch("main_code_block.pytesseract.image_to_data", return_value=data) as ocr:
+            digits = self.board._recognize_digits_mosaic(cells)
+        ocr.assert_called_once()
+        self.assertEqual(digits[0], 5)
+        self.assertEqual(digits[1], 3)
+        self.assertEqual(digits[40], 7)
+        self.assertEqual(np.count_nonzero(digits), 3)
+
+    def test_recognize_digit_uses_inprocess_api(self):
+        cell = np.full((40, 40), 255, dtype=np.uint8)
+        cell[10:30, 15:25] = 0
+        api = MagicMock()
+        api.GetUTF8Text.return_value = "7\n"
+        with patch("main_code_block.pytesseract.image_to_string") as ocr:
+            self.assertEqual(self.board._recognize_digit(cell, api), 7)
+        api.SetImage.assert_called_once()
+        ocr.assert_not_called()
+
+    def test_recognize_digit_skips_retry_on_thick_strokes(self):
+        cell = np.full((40, 40), 255, dtype=np.uint8)
+        cell[8:32, 15:25] = 0  # thick, tall stroke: dilating it won't help
+        with patch("main_code_block.pytesseract.image_to_string", return_value="") as ocr:
+            self.assertEqual(self.board._recognize_digit(cell), 0)
+        ocr.assert_called_once()
+
+    def test_recognize_digit_retries_thin_strokes(self):
+        cell = np.full((40, 40), 255, dtype=np.uint8)
+        cell[6:35, 12:14] = 0  # a thin, tall "4"
+        cell[6:35, 24:26] = 0
+        cell[22, 12:26] = 0
+        with patch("main_code_block.pytesseract.image_to_string", side_effect=["", "4"]) as ocr:
+            self.assertEqual(self.board._recognize_digit(cell), 4)
+        self.assertEqual(ocr.call_count, 2)
+
+    def test_recognize_digit_ignores_full_width_lines(self):
+        cell = np.full((40, 40), 255, dtype=np.uint8)
+        cell[16:24, :] = 0  # a stray grid line across the cell
+        with patch("main_code_block.pytesseract.image_to_string") as ocr:
+            self.assertEqual(self.board._recognize_digit(cell), 0)
+        ocr.assert_not_called()
+
+    def test_recognize_cells_keeps_cell_order(self):
+        cells = np.arange(81, dtype=np.uint8)[:, None, None] * np.ones((1, 4, 4), dtype=np.uint8)
+        pending = np.array([3, 10, 40, 80])
+        with patch.object(SudokuBoard, "_recognize_digit", side_effect=lambda cell, api=None: int(cell[0, 0]) % 9 + 1):
+            digits = self.board._recognize_cells(cells, pending)
+        self.assertEqual(digits, [4, 2, 5, 9])
+
+    def test_batch_ocr_runs_model_on_filled_cells_only(self):
+        cells = np.full((81, 40, 40), 255, dtype=np.uint8)
+        for idx in (0, 40):
+            cells[idx, 8:32, 15:25] = 0
+        for layout, shape in (([None, 1, 28, 28], (2, 1, 28, 28)), ([None, 28, 28, 1], (2, 28, 28, 1))):
+            model = MagicMock()
+            model.get_inputs.return_value = [MagicMock(shape=layout)]
+            model_input = model.get_inputs.return_value[0]
+            model.run.return_value = [np.eye(10)[[3, 8]]]  # class 3 for cell 0, class 8 for cell 40
+            self.board.digit_model = model
+            digits = self.board._recognize_digits_batch(cells)
+            batch = model.run.call_args[0][1][model_input.name]
+            self.assertEqual(batch.shape, shape)
+            self.assertLessEqual(batch.max(), 1.0)
+            self.assertEqual(digits[0], 3)
+            self.assertEqual(digits[40], 8)
+            self.assertEqual(np.count_nonzero(digits), 2)
+
+    def test_mosaic_ocr_uses_known_glyphs(self):
+        cells = np.full((81, 40, 40), 255, dtype=np.uint8)
+        cells[0, 8:32, 15:25] = 0
+        cells[1, 8:32, 15:25] = 0
+        cells[1, 8:14, 15:18] = 255  # same glyph with a notch in the corner
+        _, thresh = cv2.threshold(cells[0], 128, 255, cv2.THRESH_BINARY_INV)
+        key = self.board._glyph_hash(thresh)
+        self.board.glyph_table = {key: 1, key ^ 0xFF00FF00FF00FF00: 7}
+        with patch("main_code_block.pytesseract.image_to_data") as ocr:
+            digits = self.board._recognize_digits_mosaic(cells)
+        ocr.assert_not_called()
+        self.assertEqual(digits[0], 1)
+        self.assertEqual(digits[1], 1)  # nearest exemplar, a few bits off
+        self.assertEqual(np.count_nonzero(digits), 2)
+
+    def test_mosaic_ocr_skips_full_width_lines(self):
+        cells = np.full((81, 40, 40), 255, dtype=np.uint8)
+        cells[5, 16:24, :] = 0  # a stray grid line across the cell
+        with patch("main_code_block.pytesseract.image_to_data") as ocr:
+            digits = self.board._recognize_digits_mosaic(cells)
+        ocr.assert_not_called()
+        self.assertFalse(digits.any())
+
+    def test_save_glyphs_round_trip(self):
+        grid = np.full((504, 504), 255, dtype=np.uint8)
+        grid[12:44, 22:34] = 0  # glyph in cell (0, 0)
+        grid[68:100, 22:34] = 0  # same glyph in cell (1, 0)
+        self.board.board[:] = 0
+        self.board.board[0, 0] = 4
+        self.board.grid_image = grid
+        self.board.glyph_table = {}
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "glyph_table.json")
+            self.assertEqual(self.board.save_glyphs(path), 1)
+            with open(path) as f:
+                saved = {int(key): digit for key, digit in json.load(f).items()}
+        self.assertEqual(saved, self.board.glyph_table)
+        with patch("main_code_block.pytesseract.image_to_data") as ocr:
+            digits = self.board._recognize_digits_mosaic(self.board._split_grid(grid))
+        ocr.assert_not_called()
+        self.assertEqual(digits[0], 4)
+        self.assertEqual(digits[9], 4)
+
+    @patch("builtins.print")
+    def test_failed_model_load_is_not_retried(self, mock_print):
+        ort = MagicMock()
+        ort.InferenceSession.side_effect = RuntimeError("bad model")
+        with patch("main_code_block.ort", ort), patch("main_code_block._digit_model", None), \
+                patch("main_code_block.os.path.exists", return_value=True):
+            self.assertIsNone(SudokuBoard().digit_model)
+            self.assertIsNone(SudokuBoard().digit_model)
+        ort.InferenceSession.assert_called_once()
+        mock_print.assert_called_once()
+
+    def test_solver_board_skips_ocr_setup(self):
+        with patch("main_code_block._load_digit_model") as load_model, \
+                patch("main_code_block._load_glyph_table") as load_table:
+            solver = SudokuSolver(self.board)
+        load_model.assert_not_called()
+        load_table.assert_not_called()
+        self.assertIsNone(solver.solved_board.digit_model)
+
     def test_display_runs(self):
         try:
             self.board.display()
         except Exception as e:
             self.fail(f"display() raised an exception: {e}")
 
+    def test_display_format(self):
+        with patch("sys.stdout", new_callable=io.StringIO) as out:
+            self.board.display()
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 13)
+        self.assertEqual(lines[0], "-" * 29)
+        self.assertEqual(lines[1], " 5  3  . | .  7  . | .  .  . ")
+        self.assertEqual(lines[4], "-" * 29)
+
+    @patch("builtins.print")
+    def test_load_user_input(self, _):
+        rows = ["12345678", "12345678a", "12345678é", "1.3 456 789"] + ["0" * 9] * 8
+        board = SudokuBoard()
+        with patch("builtins.input", side_effect=rows):
+            board.load_user_input()
+        np.testing.assert_array_equal(board.board[0], [1, 0, 3, 4, 5, 6, 7, 8, 9])
+        np.testing.assert_array_equal(board.original[0], [1, 0, 1, 1, 1, 1, 1, 1, 1])
+        self.assertFalse(board.board[1:].any())
+
     def test_solver_no_change_on_solved_board(self):
         solver = SudokuSolver(self.board)
         solver.solve()